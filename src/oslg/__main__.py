@@ -0,0 +1,208 @@
+# BSD 3-Clause License
+#
+# Copyright (c) 2022-2025, rd2
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# 1. Redistributions of source code must retain the above copyright notice, this
+#    list of conditions and the following disclaimer.
+#
+# 2. Redistributions in binary form must reproduce the above copyright notice,
+#    this list of conditions and the following disclaimer in the documentation
+#    and/or other materials provided with the distribution.
+#
+# 3. Neither the name of the copyright holder nor the names of its
+#    contributors may be used to endorse or promote products derived from
+#    this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE
+# FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+# DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+# SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
+# OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+"""
+Merges and summarizes many OSlg log files, in parallel:
+
+    python -m oslg [-j JOBS] [-n TOP] [-o OUTPUT] PATH [PATH ...]
+
+Log files are either JSON Lines (one OSlg log entry per line, as returned by
+'logs()', e.g. {"level": 4, "message": "..."}) or columnar files written by
+'export()' ('.npz'). Directories are searched (recursively) for '.jsonl' and
+'.npz' files. Each file is summarized by a pool worker: JSON Lines are
+streamed, not loaded. Invalid entries are ignored.
+"""
+
+import argparse
+import json
+import os
+import sys
+
+from collections        import Counter
+from concurrent.futures import ProcessPoolExecutor
+
+from . import oslg
+
+_exts = (".jsonl", ".npz")
+
+
+def _paths(paths=[]) -> list:
+    """Returns log file paths, searching directories for log files."""
+    files = []
+
+    for path in paths:
+        if not os.path.isdir(path):
+            files.append(path)
+            continue
+
+        for root, dirs, names in os.walk(path):
+            dirs.sort()
+
+            for name in sorted(names):
+                if name.endswith(_exts): files.append(os.path.join(root, name))
+
+    return files
+
+
+def _summarize_npz(path="") -> tuple:
+    """Returns level and message counts of a columnar ('.npz') log file."""
+    cols    = oslg._read(path)
+    message = cols["message"]
+    counts  = [0] * (oslg.CN.FATAL + 1)
+    texts   = Counter()
+
+    for (cd, lvl), n in Counter(zip(cols["code"], cols["level"])).items():
+        if lvl < oslg.CN.DEBUG or lvl > oslg.CN.FATAL: continue
+        if not 0 <= cd < len(message):                 continue
+
+        txt = oslg.trim(message[cd])
+
+        if not txt: continue
+
+        counts[lvl] += n
+        texts[txt]  += n
+
+    return counts, texts
+
+
+def _summarize_jsonl(path="") -> tuple:
+    """Returns level and message counts of a JSON Lines log file (streamed)."""
+    counts = [0] * (oslg.CN.FATAL + 1)
+    texts  = Counter()
+
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            try:
+                entry   = json.loads(line)
+                lvl     = int(entry["level"])
+                message = oslg.trim(entry["message"])
+            except:
+                continue
+
+            if not message or lvl < oslg.CN.DEBUG or lvl > oslg.CN.FATAL:
+                continue
+
+            counts[lvl]    += 1
+            texts[message] += 1
+
+    return counts, texts
+
+
+def summarize(path="") -> tuple:
+    """
+    Summarizes a single log file.
+
+    Args:
+        path (str):
+            Log file path (e.g. "run.jsonl").
+
+    Returns:
+        tuple: Log file path, per-level entry counts (indexed by level),
+        message counts (Counter), and None (or error string if unreadable).
+
+    """
+    try:
+        if path.endswith(".npz"):
+            counts, texts = _summarize_npz(path)
+        else:
+            counts, texts = _summarize_jsonl(path)
+    except Exception as e:
+        return path, [0] * (oslg.CN.FATAL + 1), Counter(), oslg.trim(e)
+
+    return path, counts, texts, None
+
+
+def merge(paths=[], jobs=None, top=10) -> dict:
+    """
+    Merges and summarizes log files with a pool of worker processes.
+
+    Args:
+        paths (list):
+            Log file and/or directory paths.
+        jobs (int):
+            Number of worker processes (optional, defaults to CPU count).
+        top (int):
+            Number of most frequent messages to report.
+
+    Returns:
+        dict: Merged summary.
+
+    """
+    files  = _paths(paths)
+    counts = [0] * (oslg.CN.FATAL + 1)
+    texts  = Counter()
+    failed = {}
+
+    if files:
+        jobs  = max(1, min(jobs or os.cpu_count() or 1, len(files)))
+        chunk = max(1, len(files) // (4 * jobs))
+
+        with ProcessPoolExecutor(max_workers=jobs) as pool:
+            for path, cnts, txts, err in pool.map(summarize, files, chunksize=chunk):
+                if err is not None:
+                    failed[path] = err
+                    continue
+
+                for lvl, n in enumerate(cnts): counts[lvl] += n
+                texts.update(txts)
+
+    stat = max([lvl for lvl, n in enumerate(counts) if n] + [0])
+
+    summary = dict(files=len(files), failed=failed, entries=sum(counts))
+    summary["levels"  ] = {oslg.tag(lvl): counts[lvl] for lvl in range(oslg.CN.DEBUG, oslg.CN.FATAL + 1)}
+    summary["status"  ] = stat
+    summary["msg"     ] = oslg.msg(stat)
+    summary["messages"] = [dict(message=m, count=n) for m, n in texts.most_common(max(0, top))]
+
+    return summary
+
+
+def main(argv=None) -> int:
+    """Command-line entry point: returns an exit status."""
+    parser = argparse.ArgumentParser(prog="python -m oslg", description="Merges and summarizes OSlg log files (.jsonl, .npz).")
+    parser.add_argument("paths", nargs="+", metavar="PATH", help="log file or directory")
+    parser.add_argument("-j", "--jobs", type=int, default=None, help="worker processes (default: CPU count)")
+    parser.add_argument("-n", "--top", type=int, default=10, help="most frequent messages to report (default: 10)")
+    parser.add_argument("-o", "--output", default=None, help="summary JSON file (default: stdout)")
+    args = parser.parse_args(argv)
+
+    summary = merge(args.paths, args.jobs, args.top)
+    txt     = json.dumps(summary, indent=2, ensure_ascii=False)
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(txt + "\n")
+    else:
+        print(txt)
+
+    return 1 if summary["failed"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
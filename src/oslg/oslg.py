@@ -33,10 +33,29 @@ Python implementation of the OSlg logger, in support of the OpenStudio SDK.
 Original Ruby implementation/documentation: https://github.com/rd2/oslg
 """
 
+import ast
+import atexit
 import inspect
+import os
+import sys
+import zipfile
 
+from array       import array
+from contextlib  import contextmanager
 from dataclasses import dataclass
 
+try:
+    import multiprocessing
+    from multiprocessing import shared_memory
+    from multiprocessing import resource_tracker
+except ImportError:
+    shared_memory = None
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
 @dataclass(frozen=True)
 class _CN:
     """
@@ -55,6 +74,25 @@ class _CN:
     FATAL = 5
 CN = _CN()
 
+
+class StatusError(Exception):
+    """
+    Raised by OSlg method 'log()' once log status crosses a threshold
+    registered without a callback (see 'hook()').
+
+    Attributes:
+        status (int): Newly raised log status (e.g. CN.FATAL).
+        message (str): Triggering log message.
+
+    """
+    def __init__(self, status=0, message=""):
+        super().__init__(status, message)
+        self.status  = status
+        self.message = message
+
+    def __str__(self):
+        return "%s: %s" % (tag(self.status), self.message)
+
 _tag = ("",
         "DEBUG",
         "INFO",
@@ -69,9 +107,17 @@ _msg = ("",
         "Partial success, encountered non-fatal errors",
         "Failure, triggered fatal errors")
 
+_npz = (("seq",   "<i4", "i"),
+        ("level", "|i1", "b"),
+        ("code",  "<i4", "i"))
+
 _logs   = []
 _level  = CN.INFO
 _status = 0
+_shm    = None
+_owner  = 0
+_hooks  = []
+_epoch  = 0
 
 
 def trim(txt="", sz=None) -> str:
@@ -224,6 +270,7 @@ def log(lvl=CN.DEBUG, message="", sz=None) -> int:
     unchanged if the new level cannot be converted to an integer, or if not an
     OSlg constant (once converted). Relies on OSlg method 'trim()': candidate
     entry is ignored and status unchanged if message is not a valid string.
+    Once logged, a status raise may trigger registered hooks (see 'hook()').
 
     Args:
         lvl (int):
@@ -250,14 +297,95 @@ def log(lvl=CN.DEBUG, message="", sz=None) -> int:
     if not message or lvl < CN.DEBUG or lvl > CN.FATAL or lvl < _level:
         return _status
 
+    stat = _status
+
     if lvl > _status:
         _status = lvl
+        if _shm is not None: _shm.buf[lvl] = 1
 
     _logs.append(dict(level=lvl, message=message))
 
+    if _hooks and lvl > stat: _escalate(stat, lvl, message)
+
     return _status
 
 
+def hook(lvl=CN.FATAL, fn=None) -> int:
+    """
+    Registers a hook, fired by OSlg method 'log()' when log status crosses
+    (i.e. rises from below to at or above) a threshold level. A hook fires
+    once per crossing: status only rises until lowered by 'clean()' or
+    'rollback()', which re-arm hooks for the next crossing. Hooks fire as
+    entries are logged, even if these entries are later rolled back. Hooks
+    are checked only when status rises, and only if any are registered.
+    Without a callback, 'log()' instead raises a 'StatusError' once the entry
+    is logged (after any callbacks), e.g. to cancel outstanding work. All
+    crossed hooks fire even if a callback raises: the first callback exception
+    is then re-raised (or chained to the 'StatusError').
+    Candidate hook is ignored if the threshold cannot be converted to an
+    integer, if not an OSlg constant (once converted), or if 'fn' is neither
+    None nor callable.
+
+    Args:
+        lvl (int):
+            Selected threshold level (e.g. CN.FATAL).
+        fn:
+            Callback, called with the new status and log message (optional).
+
+    Returns:
+        int: Number of registered hooks.
+
+    """
+    try:
+        lvl = int(lvl)
+    except:
+        return len(_hooks)
+
+    if lvl < CN.DEBUG or lvl > CN.FATAL:
+        return len(_hooks)
+
+    if fn is not None and not callable(fn):
+        return len(_hooks)
+
+    _hooks.append((lvl, fn))
+
+    return len(_hooks)
+
+
+def unhook() -> int:
+    """Removes all registered hooks."""
+    _hooks.clear()
+
+    return len(_hooks)
+
+
+def _escalate(stat=0, lvl=0, message=""):
+    """
+    Fires hooks whose threshold is crossed as status rises to 'lvl'. Every
+    crossed hook is fired, even if a callback raises an exception: the first
+    such exception is then re-raised, unless a 'StatusError' is due (in which
+    case the callback exception is chained as its cause).
+
+    """
+    fail = False
+    err  = None
+
+    for thr, fn in tuple(_hooks):
+        if not stat < thr <= lvl: continue
+
+        if fn is None:
+            fail = True
+            continue
+
+        try:
+            fn(lvl, message)
+        except Exception as e:
+            if err is None: err = e
+
+    if fail: raise StatusError(lvl, message) from err
+    if err is not None: raise err
+
+
 def invalid(id="", mth="", ord=0, lvl=CN.DEBUG, res=None, sz=None):
     """
     Logs template 'invalid object' entry, based on arguments. Relies on OSlg
@@ -529,11 +657,428 @@ def negative(id="", mth="", lvl=CN.DEBUG, res=None, sz=None):
 
 
 def clean() -> int:
-    """Resets log status and entries."""
+    """Resets log status and entries. Invalidates previous savepoints."""
     global _status
     global _logs
+    global _epoch
 
     _status = 0
     _logs   = []
+    _epoch += 1
 
     return _level
+
+
+def columns(ndarray=False) -> dict:
+    """
+    Returns log entries as columns, e.g. for analytics (pandas, etc.):
+
+        "seq"    : entry sequence numbers (int32)
+        "level"  : entry levels (int8)
+        "tag"    : table of level tags, indexed by level (see 'tag()')
+        "code"   : entry message codes (int32)
+        "message": table of unique messages, indexed by code
+
+    Columns are collected in a single pass over log entries. With 'ndarray',
+    numeric columns are returned as NumPy arrays, i.e. zero-copy views over
+    the collected (stdlib) arrays.
+
+    Args:
+        ndarray (bool):
+            Whether to return NumPy arrays (if NumPy is available).
+
+    Returns:
+        dict: Log entry columns.
+
+    """
+    seq   = array("i", range(len(_logs)))
+    level = array("b")
+    code  = array("i")
+    codes = {}
+
+    for entry in _logs:
+        message = entry["message"]
+        level.append(entry["level"])
+        code.append(codes.setdefault(message, len(codes)))
+
+    cols = dict(seq=seq, level=level, tag=list(_tag), code=code)
+    cols["message"] = list(codes)
+
+    if ndarray and numpy is not None:
+        cols["seq"  ] = numpy.frombuffer(seq,   dtype=numpy.int32)
+        cols["level"] = numpy.frombuffer(level, dtype=numpy.int8)
+        cols["code" ] = numpy.frombuffer(code,  dtype=numpy.int32)
+
+    return cols
+
+
+def _npy(data=b"", descr="<i4", n=0) -> bytes:
+    """Returns a 1D NumPy '.npy' (format 1.0) image of raw data."""
+    hdr  = "{'descr': '%s', 'fortran_order': False, 'shape': (%d,), }" % (descr, n)
+    hdr += " " * (63 - (len(hdr) + 10) % 64) + "\n"
+
+    return b"\x93NUMPY\x01\x00" + len(hdr).to_bytes(2, "little") + hdr.encode("latin1") + data
+
+
+def _npy_str(strs=[]) -> bytes:
+    """Returns a 1D NumPy '.npy' image of a list of strings (UTF-32)."""
+    sz   = max([len(txt) for txt in strs] + [1])
+    data = b"".join(txt.encode("utf-32-le").ljust(4 * sz, b"\0") for txt in strs)
+
+    return _npy(data, "<U%d" % sz, len(strs))
+
+
+def export(path="") -> str:
+    """
+    Writes log entries as a compact columnar file (see 'columns()'): a
+    compressed zip of '.npy' columns, readable as is with NumPy 'load()'.
+    Requires neither NumPy nor third-party packages.
+
+    Args:
+        path (str):
+            Selected file path (e.g. "oslg.npz").
+
+    Returns:
+        str: Written file path.
+        "": If 'path' is not a valid string, or if the file cannot be written.
+
+    """
+    path = trim(path)
+
+    if not path: return ""
+
+    cols = columns()
+
+    try:
+        with zipfile.ZipFile(path, "w", zipfile.ZIP_DEFLATED) as z:
+            for key, descr, typecode in _npz:
+                if sys.byteorder == "big": cols[key].byteswap()
+
+                z.writestr(key + ".npy", _npy(cols[key].tobytes(), descr, len(_logs)))
+
+            z.writestr("tag.npy", _npy_str(cols["tag"]))
+            z.writestr("message.npy", _npy_str(cols["message"]))
+    except:
+        return ""
+
+    return path
+
+
+def _npy_read(data=b"") -> tuple:
+    """Returns the dtype descriptor, length and raw data of a 1D '.npy' image."""
+    if not data.startswith(b"\x93NUMPY"):
+        raise ValueError("Invalid .npy image")
+
+    if data[6] == 1:
+        sz  = int.from_bytes(data[8:10], "little")
+        beg = 10
+    else:
+        sz  = int.from_bytes(data[8:12], "little")
+        beg = 12
+
+    hdr   = ast.literal_eval(data[beg:beg + sz].decode("latin1"))
+    shape = hdr["shape"]
+
+    if hdr["fortran_order"] or len(shape) != 1:
+        raise ValueError("Invalid .npy shape")
+
+    return hdr["descr"], shape[0], data[beg + sz:]
+
+
+def _read(path="") -> dict:
+    """
+    Reads a columnar file (see 'export()'). Raises an exception if the file
+    cannot be read, or if a column does not match its expected dtype.
+
+    """
+    cols = {}
+
+    with zipfile.ZipFile(path) as z:
+        for key, descr, typecode in _npz:
+            dscr, n, raw = _npy_read(z.read(key + ".npy"))
+            col = array(typecode)
+
+            if dscr[1:] != descr[1:] or dscr[0] not in "<>|" or col.itemsize != int(descr[2:]):
+                raise ValueError("Invalid '%s' dtype %s (expecting %s)" % (key, dscr, descr))
+
+            if len(raw) < n * col.itemsize:
+                raise ValueError("Truncated '%s' column" % key)
+
+            col.frombytes(raw[:n * col.itemsize])
+
+            if col.itemsize > 1 and (dscr[0] == ">") != (sys.byteorder == "big"):
+                col.byteswap()
+
+            cols[key] = col
+
+        for key in ("tag", "message"):
+            dscr, n, raw = _npy_read(z.read(key + ".npy"))
+
+            if not dscr.startswith("<U") or not dscr[2:].isdigit():
+                raise ValueError("Invalid '%s' dtype %s (expecting <U)" % (key, dscr))
+
+            sz = 4 * int(dscr[2:])
+            cols[key] = [raw[i:i + sz].decode("utf-32-le").rstrip("\0") for i in range(0, n * sz, sz)]
+
+    return cols
+
+
+def load(path="") -> dict:
+    """
+    Reads log entry columns from a columnar file (see 'export()', 'columns()').
+
+    Args:
+        path (str):
+            Selected file path (e.g. "oslg.npz").
+
+    Returns:
+        dict: Log entry columns.
+        {}: If the file cannot be read, or if columns hold unexpected dtypes.
+
+    """
+    try:
+        return _read(trim(path))
+    except:
+        return {}
+
+
+def mark() -> dict:
+    """
+    Returns a savepoint token, i.e. the current number of log entries, the
+    last log entry and log status (see 'rollback()').
+
+    """
+    last = _logs[-1] if _logs else None
+
+    return dict(size=len(_logs), last=last, status=_status, epoch=_epoch)
+
+
+def rollback(token=None) -> int:
+    """
+    Rolls back log entries and status to a savepoint (see 'mark()'), e.g. to
+    discard entries of a failed attempt before trying another approach. Log
+    entries are truncated in place: only entries logged since the savepoint
+    are dropped. Rollback is ignored if the token is invalid, or if logs have
+    since been cleaned (see 'clean()') or rolled back past the savepoint, i.e.
+    if the savepoint's last log entry is no longer in place (even if new
+    entries have since been logged). A shared status cell, along with fired
+    hooks, is left unchanged.
+
+    Args:
+        token (dict):
+            Savepoint token (from 'mark()').
+
+    Returns:
+        int: Current log status, potentially restored.
+
+    """
+    global _status
+
+    try:
+        size  = int(token["size"])
+        last  = token["last"]
+        stat  = int(token["status"])
+        epoch = token["epoch"]
+    except:
+        return _status
+
+    if epoch != _epoch or not 0 <= size <= len(_logs):
+        return _status
+
+    if not 0 <= stat <= CN.FATAL:
+        return _status
+
+    if size and _logs[size - 1] is not last:
+        return _status
+
+    del _logs[size:]
+    _status = stat
+
+    return _status
+
+
+@contextmanager
+def savepoint(lvl=CN.ERROR):
+    """
+    Context manager: marks a savepoint on entry, and automatically rolls back
+    to it if the block raises an exception (re-raised), or if the block logs
+    an entry at or above a selected level. The yielded token is flagged as
+    'rolled' if so, e.g. to fall back to another approach. Hooks (see
+    'hook()') crossed within the block have nonetheless fired, and are
+    re-armed by the rollback: a fallback may fire them again.
+
+    Typical usage:
+
+        with oslg.savepoint() as sp:
+            offset(surface)
+        if sp["rolled"]:
+            intersect(surface)
+
+    Args:
+        lvl (int):
+            Selected rollback level (e.g. CN.ERROR).
+
+    Yields:
+        dict: Savepoint token (see 'mark()').
+
+    """
+    try:
+        lvl = int(lvl)
+    except:
+        lvl = CN.ERROR
+
+    token = mark()
+    token["rolled"] = False
+
+    try:
+        yield token
+    except:
+        token["rolled"] = True
+        rollback(token)
+        raise
+
+    if token["epoch"] != _epoch: return
+
+    for entry in _logs[token["size"]:]:
+        if entry["level"] >= lvl:
+            token["rolled"] = True
+            rollback(token)
+            break
+
+
+def share(name=None) -> str:
+    """
+    Creates (or attaches to) a shared status cell, e.g. across workers of a
+    process pool. The cell holds 1 byte per OSlg status: 'log()' flags the
+    byte of each newly raised status. As bytes are only ever set (never
+    cleared), concurrent updates are lock-free with 'max' semantics, and a
+    crashed worker cannot leave the cell in an inconsistent state. Calling
+    'share()' without a name creates a new cell, owned (and eventually
+    unlinked) by the calling process. Workers attach to the cell by name.
+    Any previously shared cell is first released (see 'unshare()'): a cell
+    inherited from a forked parent is only detached from, never unlinked.
+
+    Args:
+        name (str):
+            Name of an existing shared cell (optional).
+
+    Returns:
+        str: Name of the shared cell.
+        "": If the cell cannot be created or attached to.
+
+    """
+    global _shm
+    global _owner
+
+    if shared_memory is None: return ""
+
+    unshare()
+
+    try:
+        if name is None:
+            _shm   = shared_memory.SharedMemory(create=True, size=len(_msg))
+            _owner = os.getpid()
+        else:
+            _shm   = _attach(trim(name))
+            _owner = 0
+    except:
+        _shm   = None
+        _owner = 0
+        return ""
+
+    if _status: _shm.buf[_status] = 1
+
+    return _shm.name
+
+
+def _attach(name=""):
+    """
+    Attaches to a shared cell, leaving its cleanup to the owner process. Prior
+    to Python 3.13, attaching also registers the cell with a resource tracker.
+    Children started by 'multiprocessing' (fork or spawn) share the owner's
+    tracker, which holds a single entry per cell: the registration is then
+    kept, as unregistering would also drop the owner's (and leak the cell
+    should the owner crash). Any other process (e.g. unrelated to the owner)
+    runs its own tracker, whether newly started or not: the cell is then
+    unregistered, so that this tracker does not unlink the cell once the
+    process exits.
+
+    """
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)
+    except TypeError:
+        pass
+
+    tracker = getattr(resource_tracker, "_resource_tracker", None)
+    own     = getattr(tracker, "_fd", None) is None
+    own     = own or multiprocessing.parent_process() is None
+    shm     = shared_memory.SharedMemory(name=name)
+
+    if own:
+        try:
+            resource_tracker.unregister(shm._name, "shared_memory")
+        except:
+            pass
+
+    return shm
+
+
+def unshare() -> int:
+    """
+    Detaches from the shared status cell (if any). The owner process also
+    unlinks the cell (forked children inheriting the cell do not).
+    Automatically called on exit. Should the owner process crash instead, the
+    cell is unlinked by the owner's 'multiprocessing' resource tracker, once
+    any workers sharing that tracker have also exited (see '_attach()').
+
+    Returns:
+        int: Current (local) log status.
+
+    """
+    global _shm
+    global _owner
+
+    shm    = _shm
+    owner  = _owner
+    _shm   = None
+    _owner = 0
+
+    if shm is None: return _status
+
+    try:
+        shm.close()
+    except:
+        pass
+
+    if owner == os.getpid():
+        try:
+            shm.unlink()
+        except:
+            pass
+
+    return _status
+
+
+def global_status() -> int:
+    """
+    Returns the highest log status across processes sharing the status cell
+    (see 'share()'), e.g. to bail out early once any worker triggers a FATAL
+    error. Falls back to the current (local) log status if not shared.
+
+    """
+    shm = _shm
+
+    if shm is None: return _status
+
+    try:
+        buf = shm.buf
+
+        for stat in range(CN.FATAL, _status, -1):
+            if buf[stat]: return stat
+    except:
+        pass
+
+    return _status
+
+
+atexit.register(unshare)
@@ -27,8 +27,17 @@
 # OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
 # OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
 
+import json
+import multiprocessing
+import os
+import pickle
+import subprocess
+import sys
+import tempfile
 import unittest
+import zipfile
 from src.oslg import oslg
+from src.oslg import __main__ as cli
 
 DBG = oslg.CN.DEBUG
 INF = oslg.CN.INFO
@@ -36,6 +45,14 @@ WRN = oslg.CN.WARN
 ERR = oslg.CN.ERROR
 FTL = oslg.CN.FATAL
 
+def _worker(name=""):
+    oslg.share(name)
+    oslg.log(FTL, "Worker failure")
+    oslg.unshare()
+
+def _logger(lvl=DBG):
+    return oslg.log(lvl, "Worker entry")
+
 class TestOSlgModuleMethods(unittest.TestCase):
     def test_oslg_constants(self):
         self.assertEqual(DBG, 1)
@@ -215,5 +232,291 @@ class TestOSlgModuleMethods(unittest.TestCase):
         self.assertEqual(oslg.clean(), INF)
         self.assertEqual(oslg.level(), INF)
 
+    def test08_oslg_shared_status(self):
+        self.assertEqual(oslg.level(), INF)
+        self.assertFalse(oslg.logs())
+        self.assertEqual(oslg.global_status(), 0)
+        name = oslg.share()
+        self.assertTrue(name)
+        self.assertEqual(oslg.global_status(), 0)
+        self.assertEqual(oslg.log(WRN, "Local warning"), WRN)
+        self.assertEqual(oslg.global_status(), WRN)
+        ctx = multiprocessing.get_context("spawn")
+        p = ctx.Process(target=_worker, args=(name,))
+        p.start()
+        p.join()
+        self.assertEqual(p.exitcode, 0)
+        self.assertEqual(oslg.status(), WRN)
+        self.assertEqual(oslg.global_status(), FTL)
+        self.assertEqual(len(oslg.logs()), 1)
+
+        # Unrelated process: exiting must not unlink the owner's cell.
+        code = "from src.oslg import oslg; print(oslg.share(%r))" % name
+        run  = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True)
+        self.assertEqual(run.stdout.strip(), name)
+        self.assertFalse(run.stderr)
+        run  = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True)
+        self.assertEqual(run.stdout.strip(), name)
+        self.assertEqual(oslg.global_status(), FTL)
+
+        # Unrelated process, already running its own tracker.
+        code = "from src.oslg import oslg; oslg.share(); print(oslg.share(%r))" % name
+        run  = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True)
+        self.assertEqual(run.stdout.strip(), name)
+        self.assertFalse(run.stderr)
+        run  = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True)
+        self.assertEqual(run.stdout.strip(), name)
+        self.assertEqual(oslg.global_status(), FTL)
+        self.assertEqual(oslg.unshare(), WRN)
+        self.assertEqual(oslg.global_status(), WRN)
+        self.assertEqual(oslg.share("oslg_missing_cell"), "")
+        self.assertEqual(oslg.clean(), INF)
+        self.assertEqual(oslg.level(), INF)
+
+    @unittest.skipUnless("fork" in multiprocessing.get_all_start_methods(), "requires fork")
+    def test08_oslg_shared_status_forked(self):
+        self.assertEqual(oslg.level(), INF)
+        self.assertFalse(oslg.logs())
+        name = oslg.share()
+        self.assertTrue(name)
+        ctx = multiprocessing.get_context("fork")
+
+        with ctx.Pool(2, initializer=oslg.share, initargs=(name,)) as pool:
+            self.assertEqual(pool.map(_logger, [WRN, FTL], 1), [WRN, FTL])
+
+        self.assertEqual(oslg.status(), 0)
+        self.assertEqual(oslg.global_status(), FTL)
+        self.assertEqual(oslg.unshare(), 0)
+        self.assertEqual(oslg.share(name), "")
+        self.assertEqual(oslg.clean(), INF)
+        self.assertEqual(oslg.level(), INF)
+
+    def test09_oslg_hooks(self):
+        fired = []
+        self.assertEqual(oslg.level(), INF)
+        self.assertFalse(oslg.logs())
+        self.assertEqual(oslg.hook(ERR, lambda s, m: fired.append((s, m))), 1)
+        self.assertEqual(oslg.hook(10, print), 1)
+        self.assertEqual(oslg.hook(FTL, "print"), 1)
+        self.assertEqual(oslg.hook(FTL), 2)
+        self.assertEqual(oslg.log(WRN, "Warning"), WRN)
+        self.assertFalse(fired)
+        self.assertEqual(oslg.log(ERR, "First error"), ERR)
+        self.assertEqual(oslg.log(ERR, "Second error"), ERR)
+        self.assertEqual(fired, [(ERR, "First error")])
+
+        with self.assertRaises(oslg.StatusError) as cm:
+            oslg.log(FTL, "Fatal")
+
+        self.assertEqual(cm.exception.status, FTL)
+        self.assertEqual(cm.exception.message, "Fatal")
+        self.assertEqual(str(cm.exception), "FATAL: Fatal")
+        e = pickle.loads(pickle.dumps(cm.exception))
+        self.assertIsInstance(e, oslg.StatusError)
+        self.assertEqual(e.status, FTL)
+        self.assertEqual(e.message, "Fatal")
+        self.assertEqual(str(oslg.StatusError(9, "x")), ": x")
+        self.assertTrue(oslg.is_fatal())
+        self.assertEqual(len(oslg.logs()), 4)
+        self.assertEqual(oslg.log(FTL, "Fatal again"), FTL)
+        self.assertEqual(len(fired), 1)
+        self.assertEqual(oslg.clean(), INF)
+
+        with self.assertRaises(oslg.StatusError):
+            oslg.mismatch("x", "1", int, "area", FTL, False)
+
+        self.assertTrue(oslg.is_fatal())
+        self.assertEqual(fired[-1][0], FTL)
+        self.assertEqual(len(fired), 2)
+        self.assertEqual(oslg.unhook(), 0)
+        self.assertEqual(oslg.clean(), INF)
+
+        # Failing callback: later hooks still fire.
+        def fail(s, m): raise ValueError(m)
+        self.assertEqual(oslg.hook(ERR, fail), 1)
+        self.assertEqual(oslg.hook(ERR, lambda s, m: fired.append((s, m))), 2)
+
+        with self.assertRaises(ValueError):
+            oslg.log(ERR, "Error")
+
+        self.assertEqual(fired[-1], (ERR, "Error"))
+        self.assertEqual(oslg.hook(FTL), 3)
+
+        with self.assertRaises(oslg.StatusError) as cm:
+            oslg.log(FTL, "Fatal")
+
+        self.assertIsNone(cm.exception.__cause__)
+        self.assertEqual(oslg.clean(), INF)
+
+        with self.assertRaises(oslg.StatusError) as cm:
+            oslg.log(FTL, "Fatal")
+
+        self.assertIsInstance(cm.exception.__cause__, ValueError)
+        self.assertEqual(fired[-1], (FTL, "Fatal"))
+        self.assertEqual(oslg.unhook(), 0)
+        self.assertEqual(oslg.clean(), INF)
+        self.assertEqual(oslg.level(), INF)
+
+    def test10_oslg_savepoints(self):
+        self.assertEqual(oslg.level(), INF)
+        self.assertFalse(oslg.logs())
+        self.assertEqual(oslg.log(WRN, "Warning"), WRN)
+        sp = oslg.mark()
+        self.assertEqual(oslg.log(ERR, "Failed offset"), ERR)
+        self.assertEqual(oslg.log(INF, "Info"), ERR)
+        self.assertEqual(len(oslg.logs()), 3)
+        self.assertEqual(oslg.rollback(sp), WRN)
+        self.assertTrue(oslg.is_warn())
+        self.assertEqual(len(oslg.logs()), 1)
+        self.assertEqual(oslg.logs()[0]["message"], "Warning")
+        self.assertEqual(oslg.rollback(None), WRN)
+        self.assertEqual(oslg.rollback(oslg.mark() | dict(status=99)), WRN)
+        self.assertEqual(oslg.rollback(oslg.mark() | dict(status=-1)), WRN)
+
+        with oslg.savepoint() as sp1:
+            oslg.log(INF, "Offset")
+
+        self.assertFalse(sp1["rolled"])
+        self.assertEqual(len(oslg.logs()), 2)
+
+        with oslg.savepoint() as sp2:
+            oslg.zero("width", "offset", ERR)
+
+        self.assertTrue(sp2["rolled"])
+        self.assertTrue(oslg.is_warn())
+        self.assertEqual(len(oslg.logs()), 2)
+
+        # Hooks fire for rolled back entries, and are re-armed.
+        fired = []
+        self.assertEqual(oslg.hook(ERR, lambda s, m: fired.append(m)), 1)
+
+        for m in ("1", "2"):
+            with oslg.savepoint():
+                oslg.log(ERR, m)
+
+        self.assertEqual(fired, ["1", "2"])
+        self.assertEqual(oslg.unhook(), 0)
+        self.assertEqual(len(oslg.logs()), 2)
+
+        with self.assertRaises(ValueError):
+            with oslg.savepoint() as sp3:
+                oslg.log(WRN, "Intersection")
+                raise ValueError
+
+        self.assertTrue(sp3["rolled"])
+        self.assertEqual(len(oslg.logs()), 2)
+
+        # Stale token, once rolled back past (despite new entries).
+        sp1 = oslg.mark()
+        for i in range(3): oslg.log(WRN, "old%d" % i)
+        sp2 = oslg.mark()
+        self.assertEqual(len(oslg.logs()), 5)
+        self.assertEqual(oslg.rollback(sp1), WRN)
+        self.assertEqual(len(oslg.logs()), 2)
+        for i in range(4): oslg.log(ERR, "new%d" % i)
+        self.assertEqual(oslg.rollback(sp2), ERR)
+        self.assertEqual(len(oslg.logs()), 6)
+        self.assertEqual(oslg.rollback(sp1), WRN)
+        self.assertEqual(len(oslg.logs()), 2)
+        sp = oslg.mark()
+        self.assertEqual(oslg.clean(), INF)
+        self.assertEqual(oslg.log(ERR, "Error"), ERR)
+        self.assertEqual(oslg.rollback(sp), ERR)
+        self.assertEqual(len(oslg.logs()), 1)
+        self.assertEqual(oslg.clean(), INF)
+        self.assertEqual(oslg.level(), INF)
+
+    def test11_oslg_columns(self):
+        self.assertEqual(oslg.level(), INF)
+        self.assertFalse(oslg.logs())
+        self.assertEqual(oslg.log(WRN, "Warning"), WRN)
+        self.assertEqual(oslg.log(ERR, "Error"), ERR)
+        self.assertEqual(oslg.log(WRN, "Warning"), ERR)
+        cols = oslg.columns()
+        self.assertEqual(list(cols["seq"]), [0, 1, 2])
+        self.assertEqual(list(cols["level"]), [WRN, ERR, WRN])
+        self.assertEqual(list(cols["code"]), [0, 1, 0])
+        self.assertEqual(cols["message"], ["Warning", "Error"])
+        self.assertEqual(cols["tag"][ERR], oslg.tag(ERR))
+        self.assertEqual(oslg.export(""), "")
+
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "oslg.npz")
+            self.assertEqual(oslg.export(path), path)
+
+            with zipfile.ZipFile(path) as z:
+                names = ["seq.npy", "level.npy", "code.npy", "tag.npy", "message.npy"]
+                self.assertEqual(z.namelist(), names)
+                data = z.read("level.npy")
+                self.assertTrue(data.startswith(b"\x93NUMPY"))
+                self.assertEqual((10 + int.from_bytes(data[8:10], "little")) % 64, 0)
+                self.assertTrue(data.endswith(bytes([WRN, ERR, WRN])))
+
+            cols = oslg.load(path)
+            self.assertEqual(list(cols["seq"]), [0, 1, 2])
+            self.assertEqual(list(cols["level"]), [WRN, ERR, WRN])
+            self.assertEqual(list(cols["code"]), [0, 1, 0])
+            self.assertEqual(cols["message"], ["Warning", "Error"])
+            self.assertEqual(cols["tag"], oslg.columns()["tag"])
+
+        self.assertEqual(oslg.load(path), {})
+
+        self.assertEqual(oslg.clean(), INF)
+        self.assertEqual(oslg.level(), INF)
+
+    def test12_oslg_merge(self):
+        self.assertEqual(oslg.level(), INF)
+        self.assertFalse(oslg.logs())
+        self.assertEqual(oslg.log(WRN, "Warning"), WRN)
+        self.assertEqual(oslg.log(ERR, "Error"), ERR)
+        self.assertEqual(oslg.log(ERR, "Error"), ERR)
+
+        with tempfile.TemporaryDirectory() as tmp:
+            npz   = os.path.join(tmp, "a.npz")
+            jsonl = os.path.join(tmp, "b.jsonl")
+            self.assertEqual(oslg.export(npz), npz)
+
+            with open(jsonl, "w") as f:
+                for entry in oslg.logs(): f.write(json.dumps(entry) + "\n")
+                f.write(json.dumps(dict(level=FTL, message="Fatal")) + "\n")
+                f.write("Not JSON\n")
+                f.write(json.dumps(dict(level=10, message="Invalid")) + "\n")
+
+            summary = cli.merge([tmp], 2, 1)
+            self.assertEqual(summary["files"], 2)
+            self.assertFalse(summary["failed"])
+            self.assertEqual(summary["entries"], 7)
+            self.assertEqual(summary["levels"]["WARNING"], 2)
+            self.assertEqual(summary["levels"]["ERROR"], 4)
+            self.assertEqual(summary["levels"]["FATAL"], 1)
+            self.assertEqual(summary["status"], FTL)
+            self.assertEqual(summary["msg"], oslg.msg(FTL))
+            self.assertEqual(summary["messages"], [dict(message="Error", count=4)])
+
+            # Unexpected dtype ('<i8' codes), and empty messages.
+            bad = os.path.join(tmp, "bad.npz")
+            emp = os.path.join(tmp, "empty.npz")
+
+            for path, code, descr in ((bad, bytes(8), "<i8"), (emp, bytes(4), "<i4")):
+                with zipfile.ZipFile(path, "w") as z:
+                    z.writestr("seq.npy", oslg._npy(bytes(4), "<i4", 1))
+                    z.writestr("level.npy", oslg._npy(bytes([ERR]), "|i1", 1))
+                    z.writestr("code.npy", oslg._npy(code, descr, 1))
+                    z.writestr("tag.npy", oslg._npy_str(["", "DEBUG"]))
+                    z.writestr("message.npy", oslg._npy_str([" "]))
+
+            self.assertEqual(oslg.load(bad), {})
+            self.assertEqual(list(oslg.load(emp)["level"]), [ERR])
+            summary = cli.merge([bad, emp], 1)
+            self.assertEqual(list(summary["failed"]), [bad])
+            self.assertEqual(summary["entries"], 0)
+
+            summary = cli.merge([os.path.join(tmp, "c.jsonl")], 1)
+            self.assertEqual(len(summary["failed"]), 1)
+            self.assertEqual(summary["status"], 0)
+
+        self.assertEqual(oslg.clean(), INF)
+        self.assertEqual(oslg.level(), INF)
+
 if __name__ == "__main__":
     unittest.main()